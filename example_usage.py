@@ -11,10 +11,14 @@ Usage:
 """
 
 from scraper import scrape_trustpilot_reviews
-import json
-import pandas as pd
+import orjson
 import argparse
-from collections import Counter
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:
+    pa = None  # pyarrow is optional, pandas writes the CSV files without it
 
 # Parse command line arguments
 parser = argparse.ArgumentParser(
@@ -69,6 +73,7 @@ print()
 result = scrape_trustpilot_reviews(base_url, verbose=True, filter_5_stars=FILTER_5_STARS)
 
 reviews = result['reviews']
+df = result['dataframe']
 business_info = result['business_info']
 
 if not reviews:
@@ -88,15 +93,14 @@ if business_info:
     print(f"   Total Reviews: {business_info.get('numberOfReviews', 'N/A')}")
     print(f"   Average Stars: {business_info.get('stars', 'N/A')}/5")
 
-df = pd.DataFrame(reviews)
-
 # Overall statistics
 print(f"\n📊 Overall Statistics (scraped reviews):")
 print(f"   Number of Reviews: {len(reviews)}")
 if len(reviews) > 0:
-    print(f"   Average Rating: {df['Rating'].mean():.2f}/5")
-    print(f"   Highest Rating: {df['Rating'].max()}/5")
-    print(f"   Lowest Rating: {df['Rating'].min()}/5")
+    rating_stats = df['Rating'].agg(['mean', 'min', 'max'])
+    print(f"   Average Rating: {rating_stats['mean']:.2f}/5")
+    print(f"   Highest Rating: {rating_stats['max']:g}/5")
+    print(f"   Lowest Rating: {rating_stats['min']:g}/5")
     
     if FILTER_5_STARS:
         total_reviews = business_info.get('numberOfReviews', 0)
@@ -106,17 +110,20 @@ if len(reviews) > 0:
 
 # Statistics by location
 print(f"\n🌍 Reviews by Location:")
-locations = Counter(df['Location'])
-for location, count in sorted(locations.items(), key=lambda x: x[1], reverse=True):
-    location_reviews = df[df['Location'] == location]
-    avg_rating = location_reviews['Rating'].mean()
+# Missing locations are shown as 'None'; sort=False plus a stable sort keeps locations
+# with equal counts in order of first appearance
+location_stats = (
+    df.groupby(df['Location'].fillna('None'), sort=False)['Rating']
+    .agg(count='count', mean='mean')
+    .sort_values('count', ascending=False, kind='mergesort')
+)
+for location, count, avg_rating in location_stats.itertuples():
     print(f"   {location}: {count:3d} reviews (Ø {avg_rating:.2f}/5)")
 
 # Statistics by rating
 print(f"\n⭐ Rating Distribution:")
-ratings = Counter(df['Rating'])
-for rating in sorted(ratings.keys(), reverse=True):
-    count = ratings[rating]
+rating_counts = df['Rating'].value_counts().sort_index(ascending=False)
+for rating, count in rating_counts.items():
     percentage = (count / len(reviews)) * 100
     print(f"   {rating} stars: {count:3d} reviews ({percentage:5.1f}%)")
 
@@ -154,17 +161,26 @@ output_data = {
     }
 }
 
-with open('reviews.json', 'w', encoding='utf-8') as f:
-    json.dump(output_data, f, ensure_ascii=False, indent=2)
+with open('reviews.json', 'wb') as f:
+    f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
 print("✅ Reviews saved to 'reviews.json' (including business info)!")
 
-# Save as CSV
-df.to_csv('reviews.csv', index=False, encoding='utf-8')
-print("✅ Reviews saved to 'reviews.csv'!")
-
-# Additionally: CSV grouped by location
-df_sorted = df.sort_values(['Location', 'Date'], ascending=[True, False])
-df_sorted.to_csv('reviews_by_location.csv', index=False, encoding='utf-8')
+# Save as CSV (plus a second CSV grouped by location), using pyarrow's
+# multithreaded writer if it is installed
+if pa is not None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pacsv.write_csv(table, 'reviews.csv')
+    print("✅ Reviews saved to 'reviews.csv'!")
+    pacsv.write_csv(
+        table.sort_by([('Location', 'ascending'), ('Date', 'descending')]),
+        'reviews_by_location.csv'
+    )
+else:
+    df.to_csv('reviews.csv', index=False, encoding='utf-8', chunksize=10000)
+    print("✅ Reviews saved to 'reviews.csv'!")
+    df.sort_values(['Location', 'Date'], ascending=[True, False], kind='mergesort').to_csv(
+        'reviews_by_location.csv', index=False, encoding='utf-8', chunksize=10000
+    )
 print("✅ Reviews saved to 'reviews_by_location.csv' (sorted by location)!")
 
 print(f"\n🎉 Done! All {len(reviews)} reviews have been successfully scraped and saved.")
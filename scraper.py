@@ -1,54 +1,118 @@
 # trustpilot_scraper/scraper.py
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 import json
+import orjson
+import re
 import time
 import pandas as pd
-from collections import Counter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
-def get_reviews_from_page(url, verbose=False):
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None  # selectolax is optional, BeautifulSoup is used without it
+
+# Matches the Next.js data blob that holds the reviews, so the page doesn't need a full DOM parse
+_NEXT_DATA_RE = re.compile(rb'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+# Limits the BeautifulSoup parser to building a tree for that single script tag
+_NEXT_DATA_STRAINER = SoupStrainer("script", id="__NEXT_DATA__")
+
+# Sent with every request. Accept-Encoding lists every compression urllib3 can decode
+# here (gzip, deflate and br when brotli is installed), so Trustpilot sends compressed HTML
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"],
+    "Accept-Language": "en;q=0.9",
+}
+
+# Business unit fields returned as business info
+_BUSINESS_INFO_KEYS = ("trustScore", "numberOfReviews", "displayName", "stars")
+
+# Columns of the returned review table, in output order
+REVIEW_COLUMNS = ['Date', 'Author', 'Body', 'Heading', 'Rating', 'Location', 'URL']
+
+# Safety limit: never scrape more than this many pages (in case something goes wrong)
+MAX_PAGES = 100
+
+def create_session(pool_maxsize=4):
+    """
+    Creates a requests session that keeps the connection to Trustpilot alive
+    between pages and retries rate limiting (honoring Retry-After) and
+    transient server errors with backoff.
+    """
+    session = requests.Session()
+    session.headers.update(_HEADERS)
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry))
+    return session
+
+def find_next_data(html):
+    """
+    Returns the contents of the __NEXT_DATA__ script tag using a real HTML parser,
+    or None if the page has no such tag. Uses selectolax if installed and falls
+    back to BeautifulSoup, which also copes with badly malformed HTML.
+    """
+    if LexborHTMLParser is not None:
+        node = LexborHTMLParser(html).css_first("script#__NEXT_DATA__")
+        if node is not None:
+            return node.text()
+    soup = BeautifulSoup(html, 'lxml', parse_only=_NEXT_DATA_STRAINER)
+    script_tag = soup.find("script", id="__NEXT_DATA__")
+    if not script_tag or script_tag.string is None:
+        return None
+    return str(script_tag.string)  # orjson rejects str subclasses like NavigableString
+
+def get_reviews_from_page(url, session, verbose=False, log=print):
+    # log receives the verbose messages (print by default); pass e.g. a list's append
+    # to collect them instead, as the concurrent page fetching does
     try:
-        req = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
+        req = session.get(url)
         req.raise_for_status()  # Raise an error for bad status codes
-        time.sleep(2)  # Add a delay to avoid overwhelming the server
-        soup = BeautifulSoup(req.text, 'html.parser')
-        script_tag = soup.find("script", id="__NEXT_DATA__")
-        
-        if not script_tag:
-            if verbose:
-                print(f"Warning: __NEXT_DATA__ script tag not found on {url}")
-            return None, None, None
-        
-        reviews_raw = json.loads(script_tag.string)
+        match = _NEXT_DATA_RE.search(req.content)
+        if match:
+            reviews_raw = orjson.loads(match.group(1))
+        else:
+            # Fall back to a real HTML parser if the tag markup doesn't match the regex
+            next_data = find_next_data(req.text)
+            
+            if next_data is None:
+                if verbose:
+                    log(f"Warning: __NEXT_DATA__ script tag not found on {url}")
+                return None, None, None
+            
+            reviews_raw = orjson.loads(next_data)
         
-        # Try different paths for reviews
-        page_props = reviews_raw.get("props", {}).get("pageProps", {})
+        # Walk the page data once (empty dicts are only created for missing levels)
+        page_props = (reviews_raw.get("props") or {}).get("pageProps") or {}
+        business_unit = page_props.get("businessUnit")
+        business_unit_reviews = business_unit.get("reviews") if business_unit else None
+        if not isinstance(business_unit_reviews, dict):
+            business_unit_reviews = None
         
         # Standard path
         reviews = page_props.get("reviews")
         
-        # Try alternative paths
-        if not reviews:
-            reviews = page_props.get("businessUnit", {}).get("reviews", {}).get("reviews")
+        # Try alternative path
+        if not reviews and business_unit_reviews:
+            reviews = business_unit_reviews.get("reviews")
         
         # Extract pagination information
-        pagination = None
-        if "businessUnit" in page_props:
-            business_unit = page_props["businessUnit"]
-            if "reviews" in business_unit and isinstance(business_unit["reviews"], dict):
-                pagination = business_unit["reviews"].get("pagination")
+        pagination = business_unit_reviews.get("pagination") if business_unit_reviews else None
         
-        # Extract business unit information (only on first page)
+        # Extract business unit information (only on first page), leaving out missing
+        # fields; None if none of them are present
         business_unit_info = None
-        if "businessUnit" in page_props:
-            business_unit = page_props["businessUnit"]
+        if business_unit:
             business_unit_info = {
-                "trustScore": business_unit.get("trustScore"),
-                "numberOfReviews": business_unit.get("numberOfReviews"),
-                "displayName": business_unit.get("displayName"),
-                "stars": business_unit.get("stars")
-            }
+                key: business_unit[key] for key in _BUSINESS_INFO_KEYS if business_unit.get(key) is not None
+            } or None
         
         return reviews, pagination, business_unit_info
         
@@ -57,25 +121,91 @@ def get_reviews_from_page(url, verbose=False):
         if hasattr(e, 'response') and e.response is not None:
             if e.response.status_code == 404:
                 if verbose:
-                    print(f"404 - Page not found (end reached)")
+                    log(f"404 - Page not found (end reached)")
                 return [], None, None  # Empty list, not None
         if verbose:
-            print(f"Request error: {e}")
+            log(f"Request error: {e}")
         return None, None, None
-    except json.JSONDecodeError as e:
+    except json.JSONDecodeError as e:  # also catches orjson.JSONDecodeError (a subclass)
         if verbose:
-            print(f"JSON decode error: {e}")
+            log(f"JSON decode error: {e}")
         return None, None, None
     except AttributeError as e:
         if verbose:
-            print(f"Attribute error: {e}")
+            log(f"Attribute error: {e}")
         return None, None, None
     except Exception as e:
         if verbose:
-            print(f"Unexpected error: {e}")
+            log(f"Unexpected error: {e}")
         return None, None, None
 
-def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_stars: bool = False):
+def get_page_url(base_url, page_number, filter_5_stars=False):
+    # Use languages=all to get all reviews (not just English)
+    # With the 5-star filter, let Trustpilot filter the reviews via stars=5
+    # For page 1: no page parameter
+    # For further pages: add page=N
+    query = "languages=all&stars=5" if filter_5_stars else "languages=all"
+    if page_number == 1:
+        return f"{base_url}?{query}"
+    return f"{base_url}?{query}&page={page_number}"
+
+def iter_pages(base_url, session, max_workers=4, delay=0.5, filter_5_stars=False, verbose=False):
+    """
+    Yields (page_number, (reviews, pagination, business_unit_info), messages) in page
+    order, where messages are the verbose messages logged while fetching that page.
+    
+    Page 1 is always fetched first. If it reports the total number of pages, the
+    remaining pages are fetched concurrently, with at most max_workers pages
+    requested ahead of the caller; otherwise pages are requested one after
+    another, stopping at the last page as soon as any page reports the total.
+    When the caller stops early, pages that haven't been requested yet are
+    cancelled.
+    
+    Every request is followed by a pause of delay seconds before the same worker
+    sends its next one, to avoid overwhelming the server.
+    """
+    def fetch(page_number):
+        # Messages are collected rather than printed, so pages fetched in worker threads
+        # don't interleave their output with the caller's progress line
+        messages = []
+        url = get_page_url(base_url, page_number, filter_5_stars=filter_5_stars)
+        result = get_reviews_from_page(url, session, verbose=verbose, log=messages.append)
+        time.sleep(delay)
+        return result, messages
+
+    first_page, messages = fetch(1)
+    yield 1, first_page, messages
+
+    pagination = first_page[1]
+    total_pages = pagination.get("totalPages") if pagination else None
+    if total_pages and max_workers > 1:
+        page_numbers = iter(range(2, min(total_pages, MAX_PAGES) + 1))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque((n, executor.submit(fetch, n)) for n in islice(page_numbers, max_workers))
+            try:
+                while pending:
+                    page_number, future = pending.popleft()
+                    result, messages = future.result()
+                    # Refill the pool before handing the page over, so it keeps working meanwhile
+                    for n in islice(page_numbers, 1):
+                        pending.append((n, executor.submit(fetch, n)))
+                    yield page_number, result, messages
+            finally:
+                for _, future in pending:
+                    future.cancel()
+        return
+
+    page_number = 2
+    while not total_pages or page_number <= total_pages:
+        result, messages = fetch(page_number)
+        yield page_number, result, messages
+        pagination = result[1]
+        if pagination and pagination.get("totalPages"):
+            total_pages = pagination["totalPages"]
+        page_number += 1
+
+def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_stars: bool = False, max_workers: int = 4,
+                              delay: float = 0.5):
     """
     Scrapes all Trustpilot reviews from all pages and locations.
     
@@ -83,14 +213,18 @@ def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_star
         base_url: The Trustpilot URL (e.g. 'https://www.trustpilot.com/review/example.com')
         verbose: If True, progress will be displayed
         filter_5_stars: If True, only 5-star ratings will be scraped
+        max_workers: Number of pages fetched in parallel once the page count is known (1 = sequential)
+        delay: Seconds each worker waits after a request before sending the next one
     
     Returns:
         Dictionary with:
         - 'reviews': List of dictionaries with review data
+        - 'dataframe': The same reviews as a pandas DataFrame
         - 'business_info': Dictionary with TrustScore, numberOfReviews, etc.
     """
     reviews_data = []
-    page_number = 1
+    append_row = reviews_data.append
+    seen_review_ids = set()
     total_reviews_scraped = 0
     business_info = None
 
@@ -100,22 +234,16 @@ def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_star
             print("⚠️  Filter active: Only 5-star ratings will be scraped")
         print("-" * 60)
 
-    max_pages = None
     consecutive_empty_pages = 0
+    session = create_session(pool_maxsize=max(max_workers, 1))
+    pages = iter_pages(base_url, session, max_workers=max_workers, delay=delay,
+                       filter_5_stars=filter_5_stars, verbose=verbose)
     
-    # Use languages=all to get all reviews (not just English)
-    # For page 1: use languages=all without page parameter
-    # For further pages: use languages=all&page=N
-    while True:
-        if page_number == 1:
-            url = f"{base_url}?languages=all"
-        else:
-            url = f"{base_url}?languages=all&page={page_number}"
-        
+    for page_number, (reviews, pagination, business_unit_info), messages in pages:
         if verbose:
             print(f"Scraping page {page_number}...", end=" ", flush=True)
-        
-        reviews, pagination, business_unit_info = get_reviews_from_page(url, verbose=verbose)
+            for message in messages:
+                print(message)
         
         # Save business info on first page
         if page_number == 1 and business_unit_info:
@@ -132,7 +260,6 @@ def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_star
                 if verbose:
                     print("Two consecutive errors - scraping stopped.")
                 break
-            page_number += 1
             continue
 
         # If empty list (e.g. 404), means end
@@ -161,25 +288,28 @@ def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_star
                 current_page = pagination.get("currentPage")
                 if total_pages and verbose:
                     print(f"[Page {current_page}/{total_pages}]", end=" ")
-                if total_pages and page_number > total_pages:
-                    if verbose:
-                        print("Maximum page number reached.")
-                    break
 
 
-        page_review_count = 0
-        filtered_count = 0
-        for review in reviews:
+        # Filter: Only 5-star ratings if enabled (Trustpilot already filters via stars=5,
+        # this is a safety net in case the parameter is ignored)
+        if filter_5_stars:
+            # Non-dict entries are kept so the loop below skips them with a warning
+            selected_reviews = [
+                review for review in reviews if not isinstance(review, dict) or review.get("rating") == 5
+            ]
+        else:
+            selected_reviews = reviews
+        filtered_count = len(reviews) - len(selected_reviews)
+        
+        rows_before_page = len(reviews_data)
+        for review in selected_reviews:
             try:
-                rating = review["rating"]
-                
-                # Filter: Only 5-star ratings if enabled
-                if filter_5_stars and rating != 5:
-                    filtered_count += 1
-                    continue
-                
-                # Check if review already exists (based on unique fields)
+                # Skip reviews already seen on an earlier page (overlapping pages)
                 review_id = review.get("id") or review.get("reviewId")
+                if review_id:
+                    if review_id in seen_review_ids:
+                        continue
+                    seen_review_ids.add(review_id)
                 
                 # Construct review URL
                 # Trustpilot review URLs follow the pattern: https://www.trustpilot.com/reviews/{review_id}
@@ -190,23 +320,23 @@ def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_star
                     # If URL is already in the data, use it
                     review_url = review.get("url")
                 
-                data = {
-                    'Date': pd.to_datetime(review["dates"]["publishedDate"]).strftime("%Y-%m-%d"),
+                append_row({
+                    # publishedDate is ISO 8601 (e.g. 2024-05-12T09:33:21.000Z), so the date is its first 10 characters
+                    'Date': review["dates"]["publishedDate"][:10],
                     'Author': review["consumer"]["displayName"],
                     'Body': review["text"],
                     'Heading': review["title"],
-                    'Rating': rating,
+                    'Rating': review["rating"],
                     'Location': review["consumer"]["countryCode"],
                     'URL': review_url or 'N/A'
-                }
-                reviews_data.append(data)
-                page_review_count += 1
-            except (KeyError, TypeError) as e:
+                })
+            except (KeyError, TypeError, AttributeError) as e:
                 # Skip reviews with missing data
                 if verbose:
                     print(f"\n  Warning: Review skipped (missing data: {e})")
                 continue
         
+        page_review_count = len(reviews_data) - rows_before_page
         total_reviews_scraped += page_review_count
         
         if verbose:
@@ -223,28 +353,22 @@ def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_star
                     print("Two consecutive empty pages - scraping stopped.")
                 break
         
-        page_number += 1
-        
-        # Safety limit: Stop after 100 pages (in case something goes wrong)
-        if page_number > 100:
+        # Safety limit: Stop after MAX_PAGES pages
+        if page_number >= MAX_PAGES:
             if verbose:
-                print(f"\nWarning: Maximum page number (100) reached. Scraping stopped.")
+                print(f"\nWarning: Maximum page number ({MAX_PAGES}) reached. Scraping stopped.")
             break
 
-    # Remove duplicates based on all fields (not just Body)
-    seen = set()
-    unique_reviews = []
-    for review in reviews_data:
-        # Create a unique key from all relevant fields
-        review_key = (
-            review['Date'],
-            review['Author'],
-            review['Body'][:100] if review['Body'] else '',  # First 100 characters for comparison
-            review['Rating']
-        )
-        if review_key not in seen:
-            seen.add(review_key)
-            unique_reviews.append(review)
+    pages.close()
+    session.close()
+
+    # Remove remaining duplicates based on all relevant fields (reviews without an ID
+    # can't be deduplicated while scraping)
+    df = pd.DataFrame(reviews_data, columns=REVIEW_COLUMNS)
+    df = df.drop_duplicates(subset=['Date', 'Author', 'Body', 'Rating'], keep='first')
+    # Keep the original row dicts (missing values stay None instead of becoming NaN)
+    unique_reviews = [reviews_data[i] for i in df.index]
+    df = df.reset_index(drop=True)
 
     if verbose:
         print("-" * 60)
@@ -261,13 +385,15 @@ def scrape_trustpilot_reviews(base_url: str, verbose: bool = True, filter_5_star
             print(f"   Average Stars: {business_info.get('stars', 'N/A')}/5")
         
         # Statistics by location
-        if unique_reviews:
-            locations = Counter([r['Location'] for r in unique_reviews])
+        if not df.empty:
+            # Missing country codes are listed as 'None'
+            location_counts = df['Location'].fillna('None').value_counts()
             print(f"\n🌍 Reviews by Location:")
-            for location, count in sorted(locations.items(), key=lambda x: x[1], reverse=True):
+            for location, count in location_counts.items():
                 print(f"  {location}: {count} reviews")
     
     return {
         'reviews': unique_reviews,
+        'dataframe': df,
         'business_info': business_info or {}
     }
\ No newline at end of file
@@ -7,6 +7,9 @@ setup(
     install_requires=[
         'requests',
         'beautifulsoup4',
+        'lxml',
+        'orjson',
+        'brotli',
         'pandas'
         # Add any other dependencies here
     ],
@@ -59,6 +62,9 @@ Dependencies
 
 - `requests`: For making HTTP requests.
 - `beautifulsoup4`: For parsing HTML content.
+- `lxml`: Fast HTML parser backend for BeautifulSoup.
+- `orjson`: Fast JSON decoding of the embedded review data.
+- `brotli`: Lets requests accept Brotli-compressed pages.
 - `pandas`: For data manipulation.
 
 For more information and documentation, please visit the GitHub repository: https://github.com/irfanalidv/trustpilot_scraper.